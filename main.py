@@ -8,13 +8,27 @@ import os
 import time
 import json
 import random
-import requests
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import functools
+import re
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # lxml handles parsing when selectolax is unavailable
+    HTMLParser = None
+try:
+    import h2  # noqa: F401 -- lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx stays on HTTP/1.1
+    HTTP2_AVAILABLE = False
+from urllib.parse import urlsplit
 from datetime import datetime
 from dotenv import load_dotenv
-from groq import Groq
 
 # Load environment variables
 load_dotenv()
@@ -38,19 +52,157 @@ if not google_api_key or not google_search_engine_id:
 else:
     print(f"Google Search API credentials loaded successfully")
 
-# Initialize Groq client
-groq_client = Groq(api_key=groq_api_key)
+# Heavy clients (groq, httpx, lxml) are imported on first use so that importing
+# this module, e.g. to run a single agent, stays fast
+_groq_client = None
+_groq_client_lock = threading.Lock()
 
-def call_groq_llm(prompt, max_tokens=1000, retries=3):
-    """Make Groq LLM calls with retry logic and exponential backoff"""
+def get_groq_client():
+    """Create the Groq client on first use"""
+    global _groq_client
+    with _groq_client_lock:
+        if _groq_client is None:
+            from groq import Groq
+            # call_groq_llm owns retries; SDK retries underneath would multiply them
+            _groq_client = Groq(api_key=groq_api_key, max_retries=0)
+    return _groq_client
+
+# On-disk cache of LLM responses, keyed by a hash of the full request
+CACHE_DIR = os.getenv('RESEARCH_CACHE_DIR', 'cache')
+LLM_CACHE_DB = os.path.join(CACHE_DIR, 'groq_responses.sqlite3')
+# How long cached LLM responses and decompositions are reused (seconds, 0 disables)
+LLM_CACHE_TTL = int(os.getenv('RESEARCH_LLM_CACHE_TTL', 7 * 24 * 3600))
+_llm_cache_conn = None
+_llm_cache_lock = threading.Lock()
+
+def _llm_cache_key(messages, model, max_tokens, temperature, json_mode=False):
+    """Hash every request parameter that affects the completion"""
+    payload = json.dumps([model, max_tokens, temperature, json_mode, messages], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _llm_cache_db():
+    """Open the response store on first use (caller holds the lock)"""
+    global _llm_cache_conn
+    if _llm_cache_conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(LLM_CACHE_DB, check_same_thread=False)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        # Expired rows are never read again, so drop them instead of letting the file grow
+        with conn:
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - LLM_CACHE_TTL,))
+        _llm_cache_conn = conn
+    return _llm_cache_conn
+
+def _llm_cache_get(key):
+    """Return the cached response for key, or None if missing or older than LLM_CACHE_TTL"""
+    if LLM_CACHE_TTL <= 0:
+        return None
+    with _llm_cache_lock:
+        try:
+            row = _llm_cache_db().execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?", (key, time.time() - LLM_CACHE_TTL)
+            ).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            print(f"    Could not read LLM cache: {e}")
+            return None
+    return row[0] if row else None
+
+def _llm_cache_set(key, content):
+    """Store a response; only this row is written, not the whole cache"""
+    if LLM_CACHE_TTL <= 0:
+        return
+    with _llm_cache_lock:
+        try:
+            with _llm_cache_db() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                    (key, content, time.time())
+                )
+        except (OSError, sqlite3.Error) as e:
+            print(f"    Could not persist LLM cache: {e}")
+
+def _backoff_delay(attempt, cap=10.0):
+    """Exponential backoff with jitter: between half and all of min(cap, 2**attempt) seconds"""
+    delay = min(cap, 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+# Longest server-requested Retry-After we are willing to wait (seconds)
+MAX_RETRY_AFTER = 30.0
+
+def _retry_delay(e, attempt):
+    """Wait as long as a 429/503 response's Retry-After asks, else use jittered backoff"""
+    response = getattr(e, 'response', None)
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return min(max(float(retry_after), 0.0), MAX_RETRY_AFTER)
+    except (TypeError, ValueError):  # Absent, or an HTTP date
+        return _backoff_delay(attempt)
+
+def _is_transient_llm_error(e):
+    """Connection failures, rate limits, 5xx responses and empty completions are worth retrying"""
+    from groq import APIConnectionError, APIStatusError
+    
+    if isinstance(e, APIStatusError):
+        return e.status_code in (408, 409, 429) or e.status_code >= 500
+    return isinstance(e, (APIConnectionError, ValueError))
+
+def _is_transient_http_error(e):
+    """Network failures, timeouts, 429 and 5xx responses are worth retrying"""
+    import httpx
+    
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code in (408, 429) or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+# Groq models per task; decomposition is a short structural task and can be
+# pointed at a faster model (e.g. llama-3.1-8b-instant) independently of analysis
+ANALYSIS_MODEL = os.getenv('GROQ_ANALYSIS_MODEL', 'llama3-8b-8192')
+DECOMPOSITION_MODEL = os.getenv('GROQ_DECOMPOSITION_MODEL', ANALYSIS_MODEL)
+
+def call_groq_llm(prompt, max_tokens=1000, retries=3, system_prompt=None, temperature=0.7, model=ANALYSIS_MODEL,
+                  json_mode=False, validate=None):
+    """
+    Make Groq LLM calls with retry logic and exponential backoff
+    json_mode: have the API guarantee a single JSON object in the response
+    validate: called with each response; only responses it accepts without raising
+    are cached, so a malformed answer is never replayed on later runs
+    """
+    
+    def is_valid(content):
+        """True if validate accepts the response (or there is nothing to check)"""
+        if validate is None:
+            return True
+        try:
+            validate(content)
+            return True
+        except Exception as e:
+            print(f"    Response rejected by validation, not caching: {e}")
+            return False
+    
+    # Static instructions go first so repeated calls share a cacheable prefix
+    messages = [{"role": "user", "content": prompt}]
+    if system_prompt:
+        messages.insert(0, {"role": "system", "content": system_prompt})
+    
+    cache_key = _llm_cache_key(messages, model, max_tokens, temperature, json_mode)
+    extra_params = {"response_format": {"type": "json_object"}} if json_mode else {}
+    cached = _llm_cache_get(cache_key)
+    if cached and is_valid(cached):
+        print(f"    LLM cache hit ({len(cached)} characters)")
+        return cached
+    
     for attempt in range(retries):
         try:
             print(f"    LLM Attempt {attempt + 1}/{retries}")
-            response = groq_client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": prompt}],
+            response = get_groq_client().chat.completions.create(
+                model=model,
+                messages=messages,
                 max_tokens=max_tokens,
-                temperature=0.7
+                temperature=temperature,
+                **extra_params
             )
             
             content = response.choices[0].message.content
@@ -59,24 +211,65 @@ def call_groq_llm(prompt, max_tokens=1000, retries=3):
             if not content or content.strip() == "":
                 print(f"    Empty response from LLM")
                 raise ValueError("Empty response from LLM")
-                
+            
+            if is_valid(content):
+                _llm_cache_set(cache_key, content)
             return content
             
         except Exception as e:
             print(f"    Attempt {attempt + 1} failed: {e}")
+            if not _is_transient_llm_error(e):
+                print(f"    Error is not retryable")
+                raise e
             if attempt < retries - 1:
-                print(f"    Retrying in {2 ** attempt} seconds...")
-                time.sleep(2 ** attempt)  # Exponential backoff
+                delay = _retry_delay(e, attempt)
+                print(f"    Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
             else:
                 print(f"    All attempts failed")
                 raise e
 
-def agent1_query_processor(query):
+def call_groq_llm_batch(prompts, max_tokens=1000, max_workers=5, validate=None):
     """
-    Agent 1: Query Processor
-    Decompose user query into 3-5 focused sub-queries
+    Issue several independent Groq LLM calls concurrently
+    Returns: List of responses in prompt order; a failed call yields its exception instead
+    """
+    if not prompts:
+        return []
+
+    def safe_call(prompt):
+        try:
+            return call_groq_llm(prompt, max_tokens=max_tokens, validate=validate)
+        except Exception as e:
+            return e
+
+    # The Groq client pools its HTTP connections, so parallel calls share warm connections
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+        return list(executor.map(safe_call, prompts))
+
+def _extract_json(text):
+    """
+    Parse the JSON object in an LLM response, ignoring code fences and surrounding
+    prose. Raises orjson.JSONDecodeError if it does not parse
     """
-    prompt = f"""You're a query decomposition agent. Your job is to explode a vague request into non-overlapping, actionable sub-queries that fully cover the intent.
+    start = text.find('{')
+    if start == -1:
+        return orjson.loads(text)
+    return orjson.loads(text[start:text.rfind('}') + 1])
+
+def _extract_json_object(text, required_key):
+    """
+    Parse the JSON object in an LLM response and check it carries required_key.
+    Raises ValueError (orjson.JSONDecodeError is one) if it does not
+    """
+    data = _extract_json(text)
+    if not isinstance(data, dict) or required_key not in data:
+        raise ValueError(f'Expected a JSON object with "{required_key}"')
+    return data
+
+# Static decomposition instructions, sent as the system message so the prompt
+# prefix is identical across calls and only the query varies at the tail
+QUERY_DECOMPOSITION_PROMPT = """You're a query decomposition agent. Your job is to explode a vague request into non-overlapping, actionable sub-queries that fully cover the intent.
 
 DECOMPOSITION RULES:
 - Split by aspects (who/what/where/when/why/how), facets (entities, time ranges, geos), and evidence types (stats, definitions, comparisons, examples)
@@ -85,7 +278,7 @@ DECOMPOSITION RULES:
 - Add clarifying questions if the user's ask is underspecified
 
 OUTPUT FORMAT:
-Return exactly 3-5 sub-queries as a JSON array of strings. Each sub-query should be:
+Return exactly 3-5 sub-queries as the "sub_queries" array of strings in a JSON object. Each sub-query should be:
 - Specific and focused
 - Non-overlapping with others
 - Relevant to the main query
@@ -97,82 +290,200 @@ QUALITY BARS:
 - No hallucinated specifics unless marked as assumption
 - Prefer neutral wording; avoid leading premises
 
-QUERY TO DECOMPOSE: "{query}"
+The user message contains the query to decompose.
+Return only a JSON object with the sub-queries under "sub_queries", no other text. Example: {"sub_queries": ["sub-query 1", "sub-query 2", "sub-query 3"]}"""
 
-Return only the JSON array of sub-queries, no other text. Example: ["sub-query 1", "sub-query 2", "sub-query 3"]"""
+# Articles, which do not change what a research query asks; every other word can
+# ("exports to China" is not "exports by China", "how can" is not "why does")
+_QUERY_FILLER_WORDS = frozenset("a an the".split())
+_QUERY_WORD_RE = re.compile(r'\w+')
+
+def _decomposition_cache_key(query):
+    """
+    Key a query by its words in order (ignoring case, punctuation, spacing and
+    articles), the model and the decomposition instructions, so rephrasings like
+    "Impact of AI in healthcare?" and "the impact of  AI in healthcare" share one entry
+    """
+    words = [w for w in _QUERY_WORD_RE.findall(query.lower()) if w not in _QUERY_FILLER_WORDS]
+    normalized = ' '.join(words) or query.strip().lower()
+    return hashlib.sha256(f"{DECOMPOSITION_MODEL}\n{QUERY_DECOMPOSITION_PROMPT}\n{normalized}".encode('utf-8')).hexdigest()
+
+def agent1_query_processor(query):
+    """
+    Agent 1: Query Processor
+    Decompose user query into 3-5 focused sub-queries
+    """
+    prompt = f'QUERY TO DECOMPOSE: "{query}"'
+    
+    # Decomposition is deterministic (temperature 0), so a query seen before
+    # reuses its sub-queries without an LLM call
+    cache_key = _decomposition_cache_key(query)
+    cached = _llm_cache_get(cache_key)
+    if cached:
+        sub_queries = orjson.loads(cached)["sub_queries"]
+        print(f"Reusing {len(sub_queries)} cached sub-queries")
+        return sub_queries
 
     try:
-        response = call_groq_llm(prompt, max_tokens=500)
+        # 3-5 short sub-queries fit comfortably in 300 tokens; JSON mode rules out
+        # prose or code fences around the object
+        response = call_groq_llm(
+            prompt, max_tokens=300, system_prompt=QUERY_DECOMPOSITION_PROMPT, temperature=0, model=DECOMPOSITION_MODEL,
+            json_mode=True, validate=_parse_sub_queries
+        )
         
-        # Clean and parse JSON response
         try:
-            # Clean the response - remove any non-JSON text
-            response = response.strip()
-            if response.startswith('```json'):
-                response = response[7:]
-            if response.endswith('```'):
-                response = response[:-3]
-            response = response.strip()
-            
-            sub_queries = json.loads(response)
-            
-            # Validate the response
-            if isinstance(sub_queries, list) and len(sub_queries) >= 3:
-                # Ensure all items are strings and meaningful
-                valid_queries = []
-                for q in sub_queries:
-                    if isinstance(q, str) and len(q.strip()) > 10:  # Minimum meaningful length
-                        valid_queries.append(q.strip())
-                
-                if len(valid_queries) >= 3:
-                    print(f"Generated {len(valid_queries)} sub-queries")
-                    return valid_queries[:5]  # Limit to 5
-                else:
-                    print(f"Insufficient valid sub-queries, using fallback")
-                    return generate_fallback_sub_queries(query)
-            else:
-                print(f"Invalid response format, using fallback")
-                return generate_fallback_sub_queries(query)
-                
-        except json.JSONDecodeError as e:
-            print(f"Failed to parse JSON: {e}, using fallback")
+            valid_queries = _parse_sub_queries(response)
+        except ValueError as e:  # Includes orjson.JSONDecodeError
+            print(f"{e}, using fallback")
             return generate_fallback_sub_queries(query)
+        
+        print(f"Generated {len(valid_queries)} sub-queries")
+        _llm_cache_set(cache_key, orjson.dumps({"sub_queries": valid_queries}).decode('utf-8'))
+        return valid_queries
             
     except Exception as e:
         print(f"Error in Agent 1: {e}")
         return generate_fallback_sub_queries(query)
 
+def _parse_sub_queries(response):
+    """
+    Pull 3-5 meaningful sub-queries out of a decomposition response
+    Raises ValueError if the response is not usable
+    """
+    try:
+        sub_queries = _extract_json(response)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(f"Failed to parse JSON: {e}") from e
+    if isinstance(sub_queries, dict):
+        sub_queries = sub_queries.get("sub_queries")
+    
+    if not isinstance(sub_queries, list) or len(sub_queries) < 3:
+        raise ValueError("Invalid response format")
+    
+    # Ensure all items are strings and meaningful
+    valid_queries = [q.strip() for q in sub_queries if isinstance(q, str) and len(q.strip()) > 10]
+    if len(valid_queries) < 3:
+        raise ValueError("Insufficient valid sub-queries")
+    return valid_queries[:5]  # Limit to 5
+
+# Canned sub-queries for well-known topics, keyed by the keywords a query must contain
+FALLBACK_RULES = {
+    frozenset({"ai", "healthcare"}): (
+        "AI applications in medical diagnosis",
+        "Machine learning in patient care",
+        "Ethical considerations of healthcare AI"
+    ),
+    frozenset({"renewable", "energy"}): (
+        "Solar energy benefits and efficiency",
+        "Wind power technology and implementation",
+        "Economic impact of renewable energy adoption"
+    ),
+}
+
+# One pass over the query finds every rule keyword as a whole word (plural allowed)
+_FALLBACK_KEYWORD_RE = re.compile(r"\b(%s)s?\b" % "|".join(sorted(frozenset().union(*FALLBACK_RULES))))
+
 def generate_fallback_sub_queries(query):
     """
     Fallback sub-queries if LLM fails
     """
     # Simple keyword-based fallback
-    query_lower = query.lower()
-    if "ai" in query_lower and "healthcare" in query_lower:
-        return [
-            "AI applications in medical diagnosis",
-            "Machine learning in patient care",
-            "Ethical considerations of healthcare AI"
-        ]
-    elif "renewable" in query_lower and "energy" in query_lower:
-        return [
-            "Solar energy benefits and efficiency",
-            "Wind power technology and implementation",
-            "Economic impact of renewable energy adoption"
-        ]
-    else:
-        return [
-            f"Current state of {query}",
-            f"Benefits and advantages of {query}",
-            f"Challenges and limitations of {query}"
-        ]
+    found = set(_FALLBACK_KEYWORD_RE.findall(query.lower()))
+    for keywords, sub_queries in FALLBACK_RULES.items():
+        if keywords <= found:
+            return list(sub_queries)
+    
+    return [
+        f"Current state of {query}",
+        f"Benefits and advantages of {query}",
+        f"Challenges and limitations of {query}"
+    ]
+
+# Host prefixes that serve the same site as its bare domain (desktop, mobile, AMP)
+HOST_ALIAS_PREFIXES = ('www.', 'm.', 'amp.')
+
+@functools.lru_cache(maxsize=4096)
+def _url_domain(url):
+    """
+    Lower-cased network location of a URL without 'www.', mobile 'm.' or 'amp.'
+    prefixes, so every variant of a site dedupes together; memoized since candidate
+    URLs recur across sub-queries
+    """
+    domain = urlsplit(url).netloc.lower()
+    for prefix in HOST_ALIAS_PREFIXES:
+        if domain.startswith(prefix):
+            domain = domain[len(prefix):]
+    return domain
+
+# How long cached search results and scraped pages stay fresh (seconds, 0 disables)
+CACHE_TTL = int(os.getenv('RESEARCH_CACHE_TTL', 24 * 3600))
+
+def _cache_path(namespace, key):
+    """File holding the cached value for a key, e.g. cache/scrapes/<sha256>.json"""
+    return os.path.join(CACHE_DIR, namespace, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json")
+
+def _read_cache(namespace, key):
+    """Return the cached value for a key, or None if missing or older than CACHE_TTL"""
+    if CACHE_TTL <= 0:
+        return None
+    path = _cache_path(namespace, key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_TTL:
+            return None
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def _write_cache(namespace, key, value):
+    """Persist a value atomically; a failed write only costs a future cache miss"""
+    if CACHE_TTL <= 0:
+        return
+    path = _cache_path(namespace, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(value))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write {namespace} cache: {e}")
+
+# Minimum words for a page or search snippet to count as a usable source
+MIN_SOURCE_WORDS = 500
+
+def has_min_words(text, min_words=MIN_SOURCE_WORDS):
+    """True if text has at least min_words words; short strings are rejected without splitting"""
+    # n words need at least 2n - 1 characters, so typical ~160-char snippets exit here;
+    # longer text is split only up to the min_words-th word, not into every word
+    return len(text) >= 2 * min_words - 1 and len(text.split(None, min_words - 1)) >= min_words
+
+# Upper bound on downloaded HTML per page; article text sits well inside it
+MAX_PAGE_BYTES = 1_000_000
+
+# Pages declaring more than this are data dumps or listings, not articles
+MAX_DECLARED_PAGE_BYTES = 5_000_000
+
+# Minimum spacing between requests to the same host (seconds)
+HOST_REQUEST_INTERVAL = 1.0
+
+# Page regions that never hold article text
+NOISE_TAGS = ['script', 'style', 'nav', 'header', 'footer']
+NOISE_XPATH = ' | '.join(f'//{tag}' for tag in NOISE_TAGS)
 
 def agent2_data_collector(sub_queries):
     """
     Agent 2: Data Collector
     Search and scrape 2-3 web sources per sub-query
     """
-    def search_web(query, max_results=3):
+    import httpx
+    
+    # A bare query string would otherwise be iterated as one sub-query per character
+    if isinstance(sub_queries, str):
+        sub_queries = [sub_queries]
+    
+    async def search_web(client, query, max_results=3, retries=3):
         """
         Use Google Custom Search API to find relevant URLs
         Returns: List of search results with title, href, and body
@@ -184,126 +495,311 @@ def agent2_data_collector(sub_queries):
             print("Google Search API credentials not found. Please add GOOGLE_SEARCH_API_KEY and GOOGLE_SEARCH_ENGINE_ID to .env")
             return []
         
-        try:
-            # Google Custom Search API
-            url = "https://www.googleapis.com/customsearch/v1"
-            params = {
-                'key': api_key,
-                'cx': search_engine_id,
-                'q': query,
-                'num': max_results
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            results = []
-            if 'items' in data:
-                for item in data['items']:
-                    results.append({
-                        'title': item.get('title', ''),
-                        'href': item.get('link', ''),
-                        'body': item.get('snippet', '')
-                    })
+        # Results depend on the engine as much as the query, so switching engines misses
+        cache_key = f"{search_engine_id}|{query}|{max_results}"
+        cached = _read_cache('searches', cache_key)
+        if cached is not None:
+            print(f"Google Search cache hit ({len(cached)} results) for: '{query}'")
+            return cached
+        
+        # Google Custom Search API
+        url = "https://www.googleapis.com/customsearch/v1"
+        params = {
+            'key': api_key,
+            'cx': search_engine_id,
+            'q': query,
+            'num': max_results,
+            # Partial response: only the fields read below, not the full pagemap per item
+            'fields': 'items(title,link,snippet)'
+        }
+        
+        for attempt in range(retries):
+            try:
+                # Goes through the shared client, so the googleapis.com connection is reused
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+                # Parse the raw bytes directly; no charset detection or text decode
+                data = orjson.loads(response.content)
+                
+                results = []
+                if 'items' in data:
+                    for item in data['items']:
+                        results.append({
+                            'title': item.get('title', ''),
+                            'href': item.get('link', ''),
+                            'body': item.get('snippet', '')
+                        })
+                
+                print(f"Google Search found {len(results)} results for: '{query}'")
+                if results:
+                    _write_cache('searches', cache_key, results)
+                return results
+                
+            except Exception as e:
+                # Quota/5xx responses and dropped connections are worth another try
+                if attempt == retries - 1 or not _is_transient_http_error(e):
+                    print(f"Google Search failed for '{query}': {e}")
+                    return []
+                await asyncio.sleep(_retry_delay(e, attempt))
+
+    def extract_content(html):
+        """
+        Parse HTML and pull out the page title and substantial paragraphs
+        Returns: (title, paragraphs)
+        """
+        if HTMLParser is not None:
+            tree = HTMLParser(html)
             
-            print(f"Google Search found {len(results)} results for: '{query}'")
-            return results
+            # Remove noise in a single C-level pass
+            tree.strip_tags(NOISE_TAGS)
             
-        except Exception as e:
-            print(f"Google Search failed for '{query}': {e}")
-            return []
+            paragraphs = [text for p in tree.css('p') if len(text := p.text().strip()) > 100]
+            title_node = tree.css_first('title')
+            return (title_node.text(strip=True) if title_node else None), paragraphs
+        
+        from lxml import etree, html as lxml_html
+        
+        # Parse UTF-8 bytes so pages with an XML encoding declaration are accepted
+        try:
+            doc = lxml_html.document_fromstring(
+                html.encode('utf-8'), parser=lxml_html.HTMLParser(encoding='utf-8', remove_comments=True)
+            )
+        except etree.ParserError:  # Empty document
+            return None, []
+        
+        # Drop every noise subtree found by one XPath query; text after them is kept
+        for elem in doc.xpath(NOISE_XPATH):
+            elem.drop_tree()
+        
+        paragraphs = [text for p in doc.iter('p') if len(text := p.text_content().strip()) > 100]
+        title = doc.findtext('.//title')
+        return (title.strip() if title else None), paragraphs
+
+    # Earliest time each host may be hit again; only same-host requests wait
+    host_next_request = {}
 
-    def scrape_page(url, retries=2):
+    async def wait_for_host(url):
+        """Reserve the next request slot for this URL's host, sleeping only if it is too soon"""
+        now = time.monotonic()
+        domain = _url_domain(url)
+        slot = max(now, host_next_request.get(domain, now))
+        host_next_request[domain] = slot + HOST_REQUEST_INTERVAL
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def scrape_page(client, url, fetch_slots, retries=2):
         """Scrape and clean content from URL"""
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+        cached = _read_cache('scrapes', url)
+        if cached is not None:
+            print(f"Scrape cache hit ({cached['word_count']} words) for: {url}")
+            return cached
         
         for attempt in range(retries):
             try:
-                print(f"Attempting to scrape: {url}")
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
+                # Wait for the host before taking a slot so other hosts are not held up
+                await wait_for_host(url)
+                async with fetch_slots:
+                    print(f"Attempting to scrape: {url}")
+                    # Stream the body so oversized pages never load fully into memory
+                    async with client.stream('GET', url) as response:
+                        response.raise_for_status()
+                        
+                        # Decide from the headers alone whether the body is worth reading
+                        content_type = response.headers.get('Content-Type', '')
+                        if content_type and 'html' not in content_type.lower():
+                            print(f"Skipping non-HTML content ({content_type}) at {url}")
+                            return None
+                        content_length = response.headers.get('Content-Length', '')
+                        if content_length.isdigit() and int(content_length) > MAX_DECLARED_PAGE_BYTES:
+                            print(f"Skipping oversized page ({content_length} bytes) at {url}")
+                            return None
+                        
+                        chunks = []
+                        size = 0
+                        async for chunk in response.aiter_bytes(65536):
+                            chunks.append(chunk)
+                            size += len(chunk)
+                            if size >= MAX_PAGE_BYTES:
+                                print(f"Truncating {url} at {size} bytes")
+                                break
+                        html = b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Remove noise
-                for tag in ['script', 'style', 'nav', 'header', 'footer']:
-                    for elem in soup.find_all(tag):
-                        elem.decompose()
-                
-                # Extract main content
-                paragraphs = [p.get_text().strip() for p in soup.find_all('p') if len(p.get_text().strip()) > 100]
+                title, paragraphs = extract_content(html)
                 content = ' '.join(paragraphs)
                 
-                word_count = len(content.split())
+                # Same count as splitting the joined content, but one paragraph at a time
+                word_count = sum(len(paragraph.split()) for paragraph in paragraphs)
                 print(f"Scraped content: {word_count} words")
                 
-                return {
+                data = {
                     'url': url,
-                    'title': soup.title.string if soup.title else url,
+                    'title': title or url,
                     'date': datetime.now().isoformat(),
                     'word_count': word_count,
                     'content': content
                 }
+                _write_cache('scrapes', url, data)
+                return data
             except Exception as e:
-                if attempt == retries - 1:
+                # Client errors and parse failures will not change on a retry
+                if attempt == retries - 1 or not _is_transient_http_error(e):
                     print(f"Failed to scrape {url}: {e}")
-                time.sleep(1 + random.random())  # Backoff with jitter
+                    return None
+                await asyncio.sleep(_retry_delay(e, attempt))
         return None
 
-    results = {}
+    # Domains already used as a source by any sub-query
     seen_domains = set()
+    # Content digests of accepted sources, so syndicated copies of a page on
+    # other domains are not analyzed twice
+    seen_content = set()
+
+    def pages_to_scrape(search_results):
+        """
+        URLs whose search snippet is too short to use, so the full page is needed;
+        domains another sub-query already took are never fetched
+        """
+        return {result['href'] for result in search_results
+                if result.get('href') and _url_domain(result['href']) not in seen_domains
+                and not has_min_words(result.get('body', ''))}
 
-    for query in sub_queries:
+    async def select_sources(query, search_results, page_tasks):
+        """
+        Pick up to 2 sources for one sub-query, taking scraped pages as they finish
+        Returns: (query, sources)
+        """
         print(f"\nProcessing sub-query: {query}")
         sources = []
+        scrape_urls = []
         
-        # Get search results for this specific sub-query
-        search_results = search_web(query, max_results=5)
+        def add_source(data):
+            """Accept a source unless its domain or its exact content was already used"""
+            domain = _url_domain(data['url'])
+            if domain in seen_domains:
+                return False
+            digest = hashlib.blake2b(data['content'].encode('utf-8', 'ignore'), digest_size=8).digest()
+            if digest in seen_content:
+                print(f"Skipping duplicate content at: {data['url']}")
+                return False
+            sources.append(data)
+            seen_domains.add(domain)
+            seen_content.add(digest)
+            return True
         
         for result in search_results:
             url = result.get('href', '')
-            if not url:
-                continue
-                
-            domain = urlparse(url).netloc
-            if domain in seen_domains:
+            if not url or _url_domain(url) in seen_domains:
                 continue
                 
             # Use the body from search result as initial content
             body = result.get('body', '')
-            if len(body.split()) >= 500:  # If search result body is long enough
-                sources.append({
+            if has_min_words(body):  # If search result body is long enough
+                if add_source({
                     'url': url,
                     'title': result.get('title', url),
                     'date': datetime.now().isoformat(),
                     'word_count': len(body.split()),
                     'content': body
-                })
-                seen_domains.add(domain)
-                print(f"Used search result body for: {url}")
-            else:
-                # Try to scrape the full page
-                data = scrape_page(url)
-                if data and data['word_count'] >= 500:  # Accept any content with 500+ words
-                    sources.append(data)
-                    seen_domains.add(domain)
-                    print(f"Scraped full page for: {url}")
-                
-            if len(sources) >= 2:  # Stop when we have 2 good sources
-                break
-                
-            time.sleep(1.5 + random.random())  # Rate limiting
+                }):
+                    print(f"Used search result body for: {url}")
+                    if len(sources) >= 2:  # Stop when we have 2 good sources
+                        break
+            elif url not in scrape_urls:
+                scrape_urls.append(url)
         
-        if sources:
-            results[query] = sources
-            print(f"Found {len(sources)} sources for: {query}")
-        else:
-            print(f"No valid sources found for: {query}")
-            
-        time.sleep(5 + random.random() * 3)  # 5-8 second delay between queries
+        # Take full pages in completion order so the fastest two win; stop right
+        # after an accepted page so as_completed never hands out an unawaited waiter
+        if len(sources) < 2 and scrape_urls:
+            for finished in asyncio.as_completed([page_tasks[url] for url in scrape_urls]):
+                data = await finished
+                # Accept any content with enough words; the domain may have been
+                # claimed by another sub-query while the page loaded
+                if data and data['word_count'] >= MIN_SOURCE_WORDS and add_source(data):
+                    print(f"Scraped full page for: {data['url']}")
+                    if len(sources) >= 2:  # Stop when we have 2 good sources
+                        break
+        
+        return query, sources
+
+    async def stream_sources(client, max_concurrency=5):
+        """
+        Search and scrape every sub-query concurrently
+        Yields: (sub_query, sources) as soon as each sub-query's sources are final
+        """
+        fetch_slots = asyncio.Semaphore(max_concurrency)
+        page_tasks = {}
+        page_waiters = {}
+        started_tasks = []
+
+        def acquire_pages(urls):
+            """Start a scrape per URL, sharing one task between sub-queries that need the same page"""
+            for url in urls:
+                if url not in page_tasks:
+                    page_tasks[url] = asyncio.create_task(scrape_page(client, url, fetch_slots))
+                    started_tasks.append(page_tasks[url])
+                page_waiters[url] = page_waiters.get(url, 0) + 1
+
+        def release_pages(urls):
+            """Cancel unfinished scrapes that no sub-query is still waiting on"""
+            for url in urls:
+                page_waiters[url] -= 1
+                if page_waiters[url] == 0 and not page_tasks[url].done():
+                    page_tasks.pop(url).cancel()
+
+        async def process_sub_query(query):
+            """Search one sub-query, then start its scrapes without waiting on other searches"""
+            search_results = await search_web(client, query, max_results=5)
+            # select_sources picks its scrape URLs before its first await, so it sees
+            # the same seen_domains and only waits on pages acquired here
+            urls = pages_to_scrape(search_results)
+            acquire_pages(urls)
+            try:
+                return await select_sources(query, search_results, page_tasks)
+            finally:
+                release_pages(urls)
+
+        try:
+            pipelines = [process_sub_query(query) for query in dict.fromkeys(sub_queries)]
+            for pipeline in asyncio.as_completed(pipelines):
+                yield await pipeline
+        finally:
+            for task in started_tasks:
+                task.cancel()
+            await asyncio.gather(*started_tasks, return_exceptions=True)
+
+    async def collect():
+        """
+        Run every search and scrape over one pooled HTTP client
+        Returns: Dict mapping each sub-query with sources to its sources
+        """
+        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'}
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=20)
+        # Fail fast on unreachable hosts, but give slow pages the full read budget
+        timeout = httpx.Timeout(10, connect=5)
+        collected = {}
+        
+        # Keep-alive connections are reused across searches and scrapes instead of
+        # paying a fresh TCP+TLS handshake per request; with HTTP/2, concurrent
+        # searches are multiplexed over a single googleapis.com connection
+        async with httpx.AsyncClient(
+            headers=headers, timeout=timeout, follow_redirects=True, limits=limits, http2=HTTP2_AVAILABLE
+        ) as client:
+            async for query, sources in stream_sources(client):
+                if sources:
+                    collected[query] = sources
+                    print(f"Found {len(sources)} sources for: {query}")
+                else:
+                    print(f"No valid sources found for: {query}")
+        return collected
+
+    collected = asyncio.run(collect())
     
-    return results
+    # Report sub-queries in their original order regardless of completion order
+    return {query: collected[query] for query in sub_queries if query in collected}
+
+# Evidence budget for analyzing every sub-query in one call (~5k tokens), leaving
+# room for the instructions and the combined answer in llama3-8b's 8k window
+MAX_BATCH_ANALYSIS_CHARS = 20000
 
 def agent3_content_analyzer(scraped_data, original_query):
     """
@@ -322,10 +818,16 @@ def agent3_content_analyzer(scraped_data, original_query):
                 "recommendations": ["Collect more data sources before analysis"]
             }
         
+        # Replies are used, and cached, only when they have the expected shape
+        parse_batch = functools.partial(_extract_json_object, required_key="analyses")
+        parse_analysis = functools.partial(_extract_json_object, required_key="summary")
+        parse_overall = functools.partial(_extract_json_object, required_key="insights")
+        
         sub_query_analyses = {}
-        all_content = []
+        analysis_prompts = {}
+        analysis_contents = {}
         
-        # Analyze each sub-query
+        # Build an analysis prompt for each sub-query
         for sub_query, sources in scraped_data.items():
             print(f"  Analyzing sub-query: {sub_query[:60]}...")
             
@@ -339,7 +841,7 @@ def agent3_content_analyzer(scraped_data, original_query):
                 continue
             
             # Prepare content for analysis (truncate to avoid token limits)
-            content_text = ""
+            content_parts = []
             total_chars = 0
             max_chars_per_source = 1500  # Limit each source to ~1500 chars to stay under token limits
             
@@ -348,15 +850,14 @@ def agent3_content_analyzer(scraped_data, original_query):
                 if len(source_content) > max_chars_per_source:
                     source_content = source_content[:max_chars_per_source] + "..."
                 
-                content_text += f"Source: {source.get('title', 'No title')}\n"
-                content_text += f"Content: {source_content}\n\n"
-                all_content.append(source_content)
+                content_parts.append(f"Source: {source.get('title', 'No title')}\nContent: {source_content}\n\n")
                 total_chars += len(source_content)
             
+            content_text = "".join(content_parts)
             print(f"    Content prepared: {total_chars} characters (~{total_chars//4} tokens)")
+            analysis_contents[sub_query] = content_text
             
-            # Analyze this sub-query with LLM
-            analysis_prompt = f"""Analyze the following content related to: "{sub_query}"
+            analysis_prompts[sub_query] = f"""Analyze the following content related to: "{sub_query}"
 
 Content to analyze:
 {content_text}
@@ -370,55 +871,71 @@ Provide a structured analysis in JSON format with:
 }}
 
 Focus on extracting actionable insights and concrete evidence."""
+        
+        # Analyze all sub-queries and synthesize the overall insights in a single
+        # call when the evidence fits; sub-queries it misses get their own call
+        batch_overall = None
+        batch_chars = sum(len(content) for content in analysis_contents.values())
+        if analysis_prompts and batch_chars <= MAX_BATCH_ANALYSIS_CHARS:
+            batched = list(analysis_prompts)
+            sections = "".join(
+                f'Sub-query {i}: "{sub_query}"\n{analysis_contents[sub_query]}'
+                for i, sub_query in enumerate(batched, 1)
+            )
+            batch_prompt = f"""Analyze the following content collected for each sub-query of: "{original_query}"
+
+{sections}
+Provide a structured analysis in JSON format, with one entry per sub-query number:
+{{
+    "analyses": {{
+        "1": {{
+            "summary": "A concise summary of the key points",
+            "key_findings": ["finding1", "finding2", "finding3"],
+            "evidence": ["specific evidence or examples"],
+            "confidence": 0.85
+        }}
+    }},
+    "insights": ["overall insight 1", "overall insight 2"],
+    "gaps": ["identified data gaps"],
+    "recommendations": ["actionable recommendation 1", "recommendation 2"]
+}}
+
+Focus on extracting actionable insights and concrete evidence, and synthesize patterns across all sub-queries."""
             
             try:
-                analysis_response = call_groq_llm(analysis_prompt, max_tokens=800)
-                print(f"    LLM Response: {analysis_response[:200]}...")
+                print(f"  Analyzing {len(batched)} sub-queries in one call ({batch_chars} characters)")
+                batch_response = call_groq_llm(
+                    batch_prompt, max_tokens=min(3000, 400 + 400 * len(batched)), validate=parse_batch
+                )
+                print(f"    LLM Response: {batch_response[:200]}...")
                 
-                # Try to parse JSON response
-                try:
-                    # Clean the response - remove any non-JSON text
-                    cleaned_response = analysis_response.strip()
-                    if "{" in cleaned_response:
-                        start_idx = cleaned_response.find("{")
-                        end_idx = cleaned_response.rfind("}") + 1
-                        cleaned_response = cleaned_response[start_idx:end_idx]
-                    
-                    analysis_data = json.loads(cleaned_response)
-                    
-                    sub_query_analyses[sub_query] = {
-                        "summary": analysis_data.get("summary", "Analysis failed"),
-                        "key_findings": analysis_data.get("key_findings", []),
-                        "evidence": analysis_data.get("evidence", []),
-                        "confidence": analysis_data.get("confidence", 0.5)
-                    }
-                    
-                except json.JSONDecodeError as json_err:
-                    print(f"    JSON parsing failed: {json_err}")
-                    print(f"    Raw response: {analysis_response}")
-                    
-                    # Fallback: extract what we can from the text
-                    sub_query_analyses[sub_query] = {
-                        "summary": f"Analysis completed but format invalid: {analysis_response[:100]}...",
-                        "key_findings": ["Format parsing failed"],
-                        "evidence": ["LLM response not in expected JSON format"],
-                        "confidence": 0.3
-                    }
+                batch_data = parse_batch(batch_response)
+                batch_analyses = batch_data.get("analyses") or {}
+                
+                for i, sub_query in enumerate(batched, 1):
+                    analysis_data = batch_analyses.get(str(i))
+                    if isinstance(analysis_data, dict) and analysis_data.get("summary"):
+                        sub_query_analyses[sub_query] = {
+                            "summary": analysis_data["summary"],
+                            "key_findings": analysis_data.get("key_findings", []),
+                            "evidence": analysis_data.get("evidence", []),
+                            "confidence": analysis_data.get("confidence", 0.5)
+                        }
+                        del analysis_prompts[sub_query]
+                
+                if "insights" in batch_data:
+                    batch_overall = batch_data
                 
             except Exception as e:
-                print(f"    LLM call failed for sub-query: {e}")
-                sub_query_analyses[sub_query] = {
-                    "summary": "Analysis failed due to LLM error",
-                    "key_findings": [],
-                    "evidence": [],
-                    "confidence": 0.0
-                }
+                # Malformed or failed batch: fall back to one call per sub-query
+                print(f"  Batched analysis failed, analyzing sub-queries separately: {e}")
         
-        # Generate overall insights
+        # Without batched insights the overall call only needs the sub-query count,
+        # so it runs alongside the remaining analyses instead of after them
         overall_prompt = f"""Based on the analysis of multiple sub-queries about "{original_query}", 
 provide overall insights and recommendations.
 
-Sub-query analyses completed: {len(sub_query_analyses)}
+Sub-query analyses completed: {len(scraped_data)}
 
 Provide a structured response in JSON format:
 {{
@@ -429,38 +946,84 @@ Provide a structured response in JSON format:
 
 Focus on synthesizing patterns across all sub-queries."""
         
-        try:
-            overall_response = call_groq_llm(overall_prompt, max_tokens=600)
-            print(f"  Overall LLM Response: {overall_response[:200]}...")
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if batch_overall is None:
+                overall_future = executor.submit(call_groq_llm, overall_prompt, max_tokens=400, validate=parse_overall)
             
+            # Remaining sub-query analyses are independent, so issue them concurrently
+            analysis_responses = call_groq_llm_batch(
+                list(analysis_prompts.values()), max_tokens=500, validate=parse_analysis
+            )
+        
+        for sub_query, analysis_response in zip(analysis_prompts, analysis_responses):
+            if isinstance(analysis_response, Exception):
+                print(f"    LLM call failed for sub-query: {analysis_response}")
+                sub_query_analyses[sub_query] = {
+                    "summary": "Analysis failed due to LLM error",
+                    "key_findings": [],
+                    "evidence": [],
+                    "confidence": 0.0
+                }
+                continue
+            
+            print(f"    LLM Response: {analysis_response[:200]}...")
+            
+            # Try to parse JSON response
             try:
-                # Clean the response - remove any non-JSON text
-                cleaned_response = overall_response.strip()
-                if "{" in cleaned_response:
-                    start_idx = cleaned_response.find("{")
-                    end_idx = cleaned_response.rfind("}") + 1
-                    cleaned_response = cleaned_response[start_idx:end_idx]
+                analysis_data = parse_analysis(analysis_response)
                 
-                overall_data = json.loads(cleaned_response)
+                sub_query_analyses[sub_query] = {
+                    "summary": analysis_data.get("summary", "Analysis failed"),
+                    "key_findings": analysis_data.get("key_findings", []),
+                    "evidence": analysis_data.get("evidence", []),
+                    "confidence": analysis_data.get("confidence", 0.5)
+                }
                 
-                overall_insights = overall_data.get("insights", ["Analysis completed successfully"])
-                data_gaps = overall_data.get("gaps", ["No major gaps identified"])
-                recommendations = overall_data.get("recommendations", ["Continue monitoring trends"])
+            except ValueError as json_err:  # Not JSON, or not the expected object
+                print(f"    JSON parsing failed: {json_err}")
+                print(f"    Raw response: {analysis_response}")
                 
-            except json.JSONDecodeError as json_err:
-                print(f"  Overall JSON parsing failed: {json_err}")
-                print(f"  Raw response: {overall_response}")
+                # Fallback: extract what we can from the text
+                sub_query_analyses[sub_query] = {
+                    "summary": f"Analysis completed but format invalid: {analysis_response[:100]}...",
+                    "key_findings": ["Format parsing failed"],
+                    "evidence": ["LLM response not in expected JSON format"],
+                    "confidence": 0.3
+                }
+        
+        # Keep analyses in the original sub-query order for the report
+        sub_query_analyses = {sq: sub_query_analyses[sq] for sq in scraped_data}
+        
+        if batch_overall is not None:
+            overall_insights = batch_overall.get("insights") or ["Analysis completed successfully"]
+            data_gaps = batch_overall.get("gaps") or ["No major gaps identified"]
+            recommendations = batch_overall.get("recommendations") or ["Continue monitoring trends"]
+        else:
+            try:
+                overall_response = overall_future.result()
+                print(f"  Overall LLM Response: {overall_response[:200]}...")
+            
+                try:
+                    overall_data = parse_overall(overall_response)
+                
+                    overall_insights = overall_data.get("insights", ["Analysis completed successfully"])
+                    data_gaps = overall_data.get("gaps", ["No major gaps identified"])
+                    recommendations = overall_data.get("recommendations", ["Continue monitoring trends"])
+                
+                except ValueError as json_err:  # Not JSON, or not the expected object
+                    print(f"  Overall JSON parsing failed: {json_err}")
+                    print(f"  Raw response: {overall_response}")
                 
-                # Fallback: extract what we can
-                overall_insights = ["Analysis completed but format parsing failed"]
-                data_gaps = ["Unable to parse LLM response format"]
-                recommendations = ["Check LLM response format and retry"]
+                    # Fallback: extract what we can
+                    overall_insights = ["Analysis completed but format parsing failed"]
+                    data_gaps = ["Unable to parse LLM response format"]
+                    recommendations = ["Check LLM response format and retry"]
             
-        except Exception as e:
-            print(f"  Overall LLM call failed: {e}")
-            overall_insights = ["Analysis completed with some errors"]
-            data_gaps = ["Unable to identify gaps due to analysis error"]
-            recommendations = ["Review and retry analysis if needed"]
+            except Exception as e:
+                print(f"  Overall LLM call failed: {e}")
+                overall_insights = ["Analysis completed with some errors"]
+                data_gaps = ["Unable to identify gaps due to analysis error"]
+                recommendations = ["Review and retry analysis if needed"]
         
         result = {
             "original_query": original_query,
@@ -483,6 +1046,9 @@ Focus on synthesizing patterns across all sub-queries."""
             "recommendations": ["Check system logs and retry"]
         }
 
+# Characters dropped from the query when naming the report file
+_UNSAFE_FILENAME_RE = re.compile(r'[^\w -]')
+
 def agent4_report_generator(structured_content, original_query):
     """
     Agent 4: Report Generator
@@ -503,7 +1069,7 @@ def agent4_report_generator(structured_content, original_query):
         
         # Generate report filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_query = "".join(c for c in original_query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_query = _UNSAFE_FILENAME_RE.sub('', original_query).rstrip()
         safe_query = safe_query.replace(' ', '_')[:50]
         filename = f"research_report_{safe_query}_{timestamp}.pdf"
         
@@ -514,10 +1080,17 @@ def agent4_report_generator(structured_content, original_query):
         from reportlab.lib.units import inch
         from reportlab.lib import colors
         
+        from xml.sax.saxutils import escape
+        
         doc = SimpleDocTemplate(filename, pagesize=letter)
         styles = getSampleStyleSheet()
+        normal, heading2, heading3 = styles['Normal'], styles['Heading2'], styles['Heading3']
         story = []
         
+        # LLM and query text is escaped so stray '<' or '&' cannot break Paragraph markup
+        def bullet(text):
+            return Paragraph(f"• {escape(str(text))}", normal)
+        
         # Title
         title_style = ParagraphStyle(
             'CustomTitle',
@@ -526,80 +1099,81 @@ def agent4_report_generator(structured_content, original_query):
             spaceAfter=30,
             alignment=1  # Center
         )
-        story.append(Paragraph(f"Research Report: {original_query}", title_style))
+        story.append(Paragraph(f"Research Report: {escape(original_query)}", title_style))
         story.append(Spacer(1, 20))
         
         # Executive Summary
-        story.append(Paragraph("Executive Summary", styles['Heading2']))
+        story.append(Paragraph("Executive Summary", heading2))
         story.append(Spacer(1, 12))
         
         if overall_insights:
             for insight in overall_insights:
-                story.append(Paragraph(f"• {insight}", styles['Normal']))
+                story.append(bullet(insight))
                 story.append(Spacer(1, 6))
         else:
-            story.append(Paragraph("No overall insights available", styles['Normal']))
+            story.append(Paragraph("No overall insights available", normal))
         
         story.append(Spacer(1, 20))
         
         # Sub-query Analysis
-        story.append(Paragraph("Detailed Analysis by Sub-Query", styles['Heading2']))
+        story.append(Paragraph("Detailed Analysis by Sub-Query", heading2))
         story.append(Spacer(1, 12))
         
         for sub_query, analysis in sub_query_analyses.items():
-            story.append(Paragraph(f"<b>{sub_query}</b>", styles['Heading3']))
+            story.append(Paragraph(f"<b>{escape(sub_query)}</b>", heading3))
             story.append(Spacer(1, 6))
             
             # Summary
-            story.append(Paragraph(f"<b>Summary:</b> {analysis.get('summary', 'No summary available')}", styles['Normal']))
+            summary = escape(str(analysis.get('summary', 'No summary available')))
+            story.append(Paragraph(f"<b>Summary:</b> {summary}", normal))
             story.append(Spacer(1, 6))
             
             # Key Findings
             key_findings = analysis.get('key_findings', [])
             if key_findings:
-                story.append(Paragraph("<b>Key Findings:</b>", styles['Normal']))
+                story.append(Paragraph("<b>Key Findings:</b>", normal))
                 for finding in key_findings:
-                    story.append(Paragraph(f"• {finding}", styles['Normal']))
+                    story.append(bullet(finding))
                     story.append(Spacer(1, 3))
             
             # Evidence
             evidence = analysis.get('evidence', [])
             if evidence:
-                story.append(Paragraph("<b>Evidence:</b>", styles['Normal']))
+                story.append(Paragraph("<b>Evidence:</b>", normal))
                 for ev in evidence:
-                    story.append(Paragraph(f"• {ev}", styles['Normal']))
+                    story.append(bullet(ev))
                     story.append(Spacer(1, 3))
             
             # Confidence
             confidence = analysis.get('confidence', 0.0)
-            story.append(Paragraph(f"<b>Confidence Level:</b> {confidence:.1%}", styles['Normal']))
+            story.append(Paragraph(f"<b>Confidence Level:</b> {confidence:.1%}", normal))
             
             story.append(Spacer(1, 15))
         
         # Data Gaps
         if data_gaps:
-            story.append(Paragraph("Identified Data Gaps", styles['Heading2']))
+            story.append(Paragraph("Identified Data Gaps", heading2))
             story.append(Spacer(1, 12))
             for gap in data_gaps:
-                story.append(Paragraph(f"• {gap}", styles['Normal']))
+                story.append(bullet(gap))
                 story.append(Spacer(1, 6))
             story.append(Spacer(1, 15))
         
         # Recommendations
         if recommendations:
-            story.append(Paragraph("Recommendations", styles['Heading2']))
+            story.append(Paragraph("Recommendations", heading2))
             story.append(Spacer(1, 12))
             for rec in recommendations:
-                story.append(Paragraph(f"• {rec}", styles['Normal']))
+                story.append(bullet(rec))
                 story.append(Spacer(1, 6))
             story.append(Spacer(1, 15))
         
         # Metadata
-        story.append(Paragraph("Report Metadata", styles['Heading2']))
+        story.append(Paragraph("Report Metadata", heading2))
         story.append(Spacer(1, 12))
-        story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-        story.append(Paragraph(f"<b>Sub-queries Analyzed:</b> {len(sub_query_analyses)}", styles['Normal']))
-        story.append(Paragraph(f"<b>Total Sources:</b> {sum(len(sources) for sources in sub_query_analyses.values())}", styles['Normal']))
+        story.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal))
+        story.append(Paragraph(f"<b>Sub-queries Analyzed:</b> {len(sub_query_analyses)}", normal))
+        story.append(Paragraph(f"<b>Total Sources:</b> {sum(len(sources) for sources in sub_query_analyses.values())}", normal))
         
         # Build PDF
         doc.build(story)
@@ -633,6 +1207,9 @@ def run_pipeline(query):
         # Agent 3: Content Analyzer
         structured_content = agent3_content_analyzer(scraped_data, query)
         
+        # The report only needs the analysis; free the scraped page text before building it
+        del scraped_data
+        
         # Agent 4: Report Generator
         if structured_content:
             report_file = agent4_report_generator(structured_content, query)
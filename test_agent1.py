@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for Agent 1: Query Processor
+Tests query decomposition and the caching of its LLM responses
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import sys
+import os
+import tempfile
+
+# Add the current directory to Python path to import main
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from main import agent1_query_processor
+
+def groq_response(content):
+    """Build a fake Groq chat completion carrying content"""
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+class TestAgent1QueryProcessor(unittest.TestCase):
+    """Test cases for Agent 1 Query Processor"""
+
+    def setUp(self):
+        """Point the LLM response cache at a fresh temporary store"""
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_patch = patch.multiple(
+            main, CACHE_DIR=cache_dir.name, LLM_CACHE_DB=os.path.join(cache_dir.name, 'responses.sqlite3'),
+            _llm_cache_conn=None
+        )
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+        self.addCleanup(lambda: main._llm_cache_conn and main._llm_cache_conn.close())
+
+        self.query = "Impact of AI in education"
+        self.client = MagicMock()
+        client_patch = patch('main.get_groq_client', return_value=self.client)
+        client_patch.start()
+        self.addCleanup(client_patch.stop)
+
+    def test_agent1_reuses_valid_decomposition(self):
+        """Test that a valid decomposition is cached and the next run makes no LLM call"""
+        sub_queries = [
+            "AI tutoring tools used in classrooms",
+            "Effect of AI on student learning outcomes",
+            "Risks of AI for academic integrity"
+        ]
+        self.client.chat.completions.create.return_value = groq_response(json.dumps({"sub_queries": sub_queries}))
+
+        self.assertEqual(agent1_query_processor(self.query), sub_queries)
+        self.assertEqual(agent1_query_processor(self.query), sub_queries)
+        self.assertEqual(self.client.chat.completions.create.call_count, 1)
+
+    def test_agent1_skips_disabled_cache(self):
+        """Test that RESEARCH_LLM_CACHE_TTL=0 asks the LLM on every run"""
+        sub_queries = [
+            "AI tutoring tools used in classrooms",
+            "Effect of AI on student learning outcomes",
+            "Risks of AI for academic integrity"
+        ]
+        self.client.chat.completions.create.return_value = groq_response(json.dumps({"sub_queries": sub_queries}))
+
+        with patch('main.LLM_CACHE_TTL', 0):
+            agent1_query_processor(self.query)
+            agent1_query_processor(self.query)
+        self.assertEqual(self.client.chat.completions.create.call_count, 2)
+
+    def test_llm_cache_drops_expired_rows_on_open(self):
+        """Test that rows older than LLM_CACHE_TTL are deleted when the store is opened"""
+        main._llm_cache_set('fresh', 'kept')
+        main._llm_cache_set('stale', 'dropped')
+        with main._llm_cache_conn as conn:
+            conn.execute("UPDATE responses SET created_at = 0 WHERE key = 'stale'")
+        main._llm_cache_conn.close()
+        main._llm_cache_conn = None
+
+        self.assertEqual(main._llm_cache_get('fresh'), 'kept')
+        keys = [row[0] for row in main._llm_cache_conn.execute("SELECT key FROM responses")]
+        self.assertEqual(keys, ['fresh'])
+
+    def test_agent1_does_not_cache_malformed_response(self):
+        """Test that a response that falls back is asked for again on the next run"""
+        self.client.chat.completions.create.return_value = groq_response("Here are some sub-queries about AI")
+
+        fallback = main.generate_fallback_sub_queries(self.query)
+        self.assertEqual(agent1_query_processor(self.query), fallback)
+        self.assertEqual(agent1_query_processor(self.query), fallback)
+        self.assertEqual(self.client.chat.completions.create.call_count, 2)
+
+    def test_decomposition_cache_key_matches_only_same_question(self):
+        """Test that case, punctuation, spacing and articles are ignored, but other words are not"""
+        key = main._decomposition_cache_key("Why does AI fail in healthcare?")
+
+        for rephrasing in ["why does AI fail in healthcare", "Why does  AI fail in the healthcare!"]:
+            self.assertEqual(main._decomposition_cache_key(rephrasing), key, rephrasing)
+        for other_question in ["How can AI fail in healthcare", "What would AI fail at in healthcare",
+                               "Why does AI fail at healthcare", "AI fail in healthcare"]:
+            self.assertNotEqual(main._decomposition_cache_key(other_question), key, other_question)
+
+        for first, second in [("Exports to China", "Exports by China"), ("Investment in China", "Investment by China"),
+                              ("Drugs for children", "Drugs in children"), ("Life on Mars", "Life of Mars")]:
+            self.assertNotEqual(main._decomposition_cache_key(first), main._decomposition_cache_key(second), first)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for Agent 2: Data Collector
+Runs the async search/scrape pipeline against a mock HTTP transport
+"""
+
+import unittest
+from unittest.mock import patch
+import asyncio
+import gc
+import sys
+import os
+import tempfile
+import time
+import warnings
+
+import httpx
+
+# Add the current directory to Python path to import main
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from main import agent2_data_collector
+
+PARAGRAPH = " ".join(["word"] * 120)
+
+def article(marker):
+    """HTML page with enough distinct paragraph text to count as a source"""
+    paragraphs = "".join(f"<p>{PARAGRAPH} {marker} {i}</p>" for i in range(5))
+    return f"<html><head><title>{marker}</title></head><body>{paragraphs}</body></html>"
+
+class RecordingStream(httpx.AsyncByteStream):
+    """Response body that records when it is read"""
+
+    def __init__(self, url, body, reads):
+        self.url = url
+        self.body = body
+        self.reads = reads
+
+    async def __aiter__(self):
+        self.reads.append(self.url)
+        yield self.body
+
+class TestAgent2DataCollector(unittest.TestCase):
+    """Test cases for Agent 2 Data Collector"""
+
+    def setUp(self):
+        """Serve searches and pages from a mock transport, with caching and host pacing off"""
+        self.search_results = {}
+        self.delays = {}
+        self.pages = {}
+        self.headers = {}
+        self.requested = []
+        self.body_reads = []
+        self.searches = []
+        self.finished = []
+
+        real_client = httpx.AsyncClient
+        patches = [
+            patch.dict(os.environ, {'GOOGLE_SEARCH_API_KEY': 'key', 'GOOGLE_SEARCH_ENGINE_ID': 'engine'}),
+            patch.multiple(main, CACHE_TTL=0, HOST_REQUEST_INTERVAL=0),
+            patch('httpx.AsyncClient', lambda **kwargs: real_client(transport=httpx.MockTransport(self.handle), **kwargs)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    async def handle(self, request):
+        """Answer Custom Search queries from search_results and pages after their delay"""
+        if request.url.path == '/customsearch/v1':
+            self.searches.append(request.url.params['cx'])
+            links = self.search_results.get(request.url.params['q'], [])
+            items = [{'title': link, 'link': link, 'snippet': 'short snippet'} for link in links]
+            return httpx.Response(200, json={'items': items})
+
+        url = str(request.url)
+        self.requested.append(url)
+        await asyncio.sleep(self.delays.get(url, 0))
+        self.finished.append(url)
+        headers = self.headers.get(url, {'Content-Type': 'text/html; charset=utf-8'})
+        body = self.pages.get(url, article(url)).encode('utf-8')
+        return httpx.Response(200, headers=headers, stream=RecordingStream(url, body, self.body_reads))
+
+    def collect(self, sub_queries):
+        """Run Agent 2 and return its sources' URLs per sub-query, failing on never-awaited coroutines"""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            collected = agent2_data_collector(sub_queries)
+            gc.collect()
+        self.assertEqual([str(w.message) for w in caught if issubclass(w.category, RuntimeWarning)], [])
+        return {query: [source['url'] for source in sources] for query, sources in collected.items()}
+
+    def test_agent2_takes_fastest_two_pages(self):
+        """Test that the first two finished pages win and the slower scrape is cancelled"""
+        self.search_results['q'] = ['https://a.com/1', 'https://b.com/1', 'https://c.com/1']
+        self.delays['https://c.com/1'] = 2
+
+        result = self.collect(['q'])
+
+        self.assertEqual(sorted(result['q']), ['https://a.com/1', 'https://b.com/1'])
+        self.assertNotIn('https://c.com/1', self.finished)
+
+    def test_agent2_skips_unusable_pages_without_reading_them(self):
+        """Test that non-HTML and oversized responses are rejected from their headers alone"""
+        self.search_results['q'] = ['https://pdf.com/1', 'https://big.com/1', 'https://a.com/1', 'https://b.com/1']
+        self.headers['https://pdf.com/1'] = {'Content-Type': 'application/pdf'}
+        self.headers['https://big.com/1'] = {'Content-Type': 'text/html', 'Content-Length': str(main.MAX_DECLARED_PAGE_BYTES + 1)}
+        self.delays['https://a.com/1'] = 0.1
+        self.delays['https://b.com/1'] = 0.1
+
+        result = self.collect(['q'])
+
+        self.assertEqual(sorted(result['q']), ['https://a.com/1', 'https://b.com/1'])
+        self.assertEqual(sorted(self.body_reads), ['https://a.com/1', 'https://b.com/1'])
+
+    def test_agent2_dedupes_domains_and_content(self):
+        """Test that host variants and syndicated copies are not used twice"""
+        self.search_results['q1'] = ['https://www.a.com/1', 'https://b.com/1']
+        self.search_results['q2'] = ['https://m.a.com/2', 'https://c.com/2', 'https://d.com/2']
+        self.delays['https://m.a.com/2'] = 0.2
+        self.delays['https://d.com/2'] = 0.1
+        self.pages['https://d.com/2'] = article('https://c.com/2')
+
+        result = self.collect(['q1', 'q2'])
+
+        self.assertEqual(sorted(result['q1']), ['https://b.com/1', 'https://www.a.com/1'])
+        self.assertEqual(result['q2'], ['https://c.com/2'])
+
+    def test_agent2_scrapes_shared_page_once(self):
+        """Test that sub-queries needing the same page share one scrape"""
+        shared = 'https://shared.com/page'
+        self.search_results['q1'] = [shared, 'https://x.com/1']
+        self.search_results['q2'] = [shared, 'https://y.com/2']
+        self.delays[shared] = 0.1
+
+        result = self.collect(['q1', 'q2'])
+
+        self.assertEqual(self.requested.count(shared), 1)
+        self.assertEqual(sum(shared in urls for urls in result.values()), 1)
+
+    def test_agent2_search_cache_is_per_engine(self):
+        """Test that cached search results are reused for the same engine only"""
+        self.search_results['q'] = ['https://a.com/1', 'https://b.com/1']
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+
+        with patch.multiple(main, CACHE_DIR=cache_dir.name, CACHE_TTL=60):
+            self.collect(['q'])
+            self.collect(['q'])
+            with patch.dict(os.environ, {'GOOGLE_SEARCH_ENGINE_ID': 'other-engine'}):
+                self.collect(['q'])
+
+        self.assertEqual(self.searches, ['engine', 'other-engine'])
+
+class TestDiskCache(unittest.TestCase):
+    """Test cases for the search and scrape cache"""
+
+    def setUp(self):
+        """Point the cache at a fresh temporary directory"""
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_patch = patch.multiple(main, CACHE_DIR=cache_dir.name, CACHE_TTL=60)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+
+    def test_cache_returns_written_value(self):
+        """Test that a written value is read back and other keys miss"""
+        main._write_cache('searches', 'engine|q|5', [{'href': 'https://a.com'}])
+
+        self.assertEqual(main._read_cache('searches', 'engine|q|5'), [{'href': 'https://a.com'}])
+        self.assertIsNone(main._read_cache('searches', 'other-engine|q|5'))
+
+    def test_cache_expires_after_ttl(self):
+        """Test that an entry older than CACHE_TTL is a miss"""
+        main._write_cache('scrapes', 'https://a.com', {'word_count': 600})
+        path = main._cache_path('scrapes', 'https://a.com')
+        stale = time.time() - 61
+        os.utime(path, (stale, stale))
+
+        self.assertIsNone(main._read_cache('scrapes', 'https://a.com'))
+
+    def test_cache_disabled_with_zero_ttl(self):
+        """Test that CACHE_TTL=0 neither writes nor reads entries"""
+        main._write_cache('scrapes', 'https://a.com', {'word_count': 600})
+
+        with patch('main.CACHE_TTL', 0):
+            self.assertIsNone(main._read_cache('scrapes', 'https://a.com'))
+            main._write_cache('scrapes', 'https://b.com', {'word_count': 600})
+        self.assertFalse(os.path.exists(main._cache_path('scrapes', 'https://b.com')))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -61,21 +61,16 @@ class TestAgent3ContentAnalyzer(unittest.TestCase):
     def test_agent3_returns_correct_structure(self):
         """Test that Agent 3 returns the expected output structure"""
         with patch('main.call_groq_llm') as mock_llm:
-            # Mock LLM responses for different analysis steps
-            mock_llm.side_effect = [
-                # Mock response for content synthesis
-                json.dumps({
-                    "summary": "AI in healthcare involves machine learning for medical data analysis",
-                }),
-                # Mock response for key findings
-                json.dumps({
-                    "key_findings": ["AI improves diagnostic accuracy", "Data privacy concerns exist"]
-                }),
-                # Mock response for overall insights
-                json.dumps({
-                    "insights": ["AI is transforming healthcare", "Implementation challenges remain"]
-                })
-            ]
+            # Mock the single batched response covering every sub-query and the overall insights
+            mock_llm.return_value = json.dumps({
+                "analyses": {
+                    "1": {"summary": "AI in healthcare involves machine learning for medical data analysis",
+                          "key_findings": ["AI improves diagnostic accuracy"]},
+                    "2": {"summary": "AI brings accuracy gains alongside privacy and cost concerns",
+                          "key_findings": ["Data privacy concerns exist"]}
+                },
+                "insights": ["AI is transforming healthcare", "Implementation challenges remain"]
+            })
             
             result = agent3_content_analyzer(self.sample_scraped_data, self.original_query)
             
@@ -86,6 +81,13 @@ class TestAgent3ContentAnalyzer(unittest.TestCase):
             self.assertIn("overall_insights", result)
             self.assertIn("data_gaps", result)
             self.assertIn("recommendations", result)
+            
+            # Everything comes from the one batched call
+            self.assertEqual(mock_llm.call_count, 1)
+            analyses = list(result["sub_query_analyses"].values())
+            self.assertEqual(analyses[0]["key_findings"], ["AI improves diagnostic accuracy"])
+            self.assertEqual(analyses[1]["summary"], "AI brings accuracy gains alongside privacy and cost concerns")
+            self.assertEqual(result["overall_insights"], ["AI is transforming healthcare", "Implementation challenges remain"])
 
     def test_agent3_handles_empty_data(self):
         """Test that Agent 3 handles empty scraped data gracefully"""
@@ -169,6 +171,54 @@ class TestAgent3ContentAnalyzer(unittest.TestCase):
             self.assertIsInstance(result, dict)
             self.assertIn("error", str(result).lower() or "fallback" in str(result).lower())
 
+    def test_agent3_treats_non_object_reply_as_format_error(self):
+        """Test that valid JSON of the wrong shape falls back instead of failing the whole analysis"""
+        with patch('main.call_groq_llm') as mock_llm:
+            mock_llm.return_value = json.dumps(["AI improves diagnostics"])
+
+            result = agent3_content_analyzer(self.sample_scraped_data, self.original_query)
+
+        self.assertEqual(len(result["sub_query_analyses"]), 2)
+        for analysis in result["sub_query_analyses"].values():
+            self.assertIn("format invalid", analysis["summary"])
+        self.assertEqual(result["overall_insights"], ["Analysis completed but format parsing failed"])
+
+    def test_agent3_isolates_failed_sub_query(self):
+        """Test that one failed sub-query analysis does not affect the others"""
+        def fake_llm(prompt, max_tokens=1000, **kwargs):
+            if "benefits and drawbacks" in prompt:
+                raise Exception("LLM service unavailable")
+            return json.dumps({"summary": "Definitions summary", "key_findings": ["finding"]})
+
+        with patch('main.call_groq_llm', side_effect=fake_llm):
+            result = agent3_content_analyzer(self.sample_scraped_data, self.original_query)
+
+        analyses = result["sub_query_analyses"]
+        self.assertEqual(list(analyses), list(self.sample_scraped_data))
+        self.assertEqual(analyses["What are the definitions of AI and its applications in the healthcare industry?"]["summary"], "Definitions summary")
+        self.assertEqual(analyses["What are the benefits and drawbacks of implementing AI in healthcare systems?"]["summary"], "Analysis failed due to LLM error")
+
+    def test_agent3_batches_sub_queries_into_one_call(self):
+        """Test that all sub-queries and the overall insights come from a single LLM call"""
+        with patch('main.call_groq_llm') as mock_llm:
+            mock_llm.return_value = json.dumps({
+                "analyses": {
+                    "1": {"summary": "Definitions summary", "key_findings": ["finding"]},
+                    "2": {"summary": "Tradeoffs summary", "key_findings": ["finding"]}
+                },
+                "insights": ["AI is transforming healthcare"],
+                "gaps": ["Few cost studies"],
+                "recommendations": ["Pilot before scaling"]
+            })
+
+            result = agent3_content_analyzer(self.sample_scraped_data, self.original_query)
+
+            self.assertEqual(mock_llm.call_count, 1)
+            summaries = [analysis["summary"] for analysis in result["sub_query_analyses"].values()]
+            self.assertEqual(summaries, ["Definitions summary", "Tradeoffs summary"])
+            self.assertEqual(result["overall_insights"], ["AI is transforming healthcare"])
+            self.assertEqual(result["data_gaps"], ["Few cost studies"])
+
     def test_agent3_output_data_types(self):
         """Test that Agent 3 returns correct data types"""
         with patch('main.call_groq_llm') as mock_llm:
@@ -13,7 +13,7 @@ load_dotenv()
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from main import agent2_data_collector, agent3_content_analyzer
+from main import agent1_query_processor, agent2_data_collector, agent3_content_analyzer
 
 def test_agent3_with_real_data():
     """Test Agent 3 with real data collection from Agent 2"""
@@ -28,7 +28,8 @@ def test_agent3_with_real_data():
     print("\n📊 Step 1: Agent 2 - Data Collection")
     print("-" * 40)
     
-    scraped_data = agent2_data_collector(test_query)
+    sub_queries = agent1_query_processor(test_query)
+    scraped_data = agent2_data_collector(sub_queries)
     
     if not scraped_data:
         print("❌ No data collected by Agent 2")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for retry handling
+Tests which LLM and HTTP errors are retried and how long each retry waits
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+import httpx
+from groq import APIConnectionError, APIStatusError
+
+# Add the current directory to Python path to import main
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from main import call_groq_llm, _retry_delay, _is_transient_llm_error, _is_transient_http_error
+
+GROQ_URL = 'https://api.groq.com/openai/v1/chat/completions'
+
+def groq_error(status_code, retry_after=None):
+    """Build the error the Groq SDK raises for an HTTP status"""
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    response = httpx.Response(status_code, headers=headers, request=httpx.Request('POST', GROQ_URL))
+    return APIStatusError(f"Error code: {status_code}", response=response, body=None)
+
+def groq_response(content):
+    """Build a fake Groq chat completion carrying content"""
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+def http_error(status_code):
+    """Build the error httpx raises for an HTTP status"""
+    request = httpx.Request('GET', 'https://example.com')
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+class TestRetryClassification(unittest.TestCase):
+    """Test cases for deciding whether an error is worth retrying"""
+
+    def test_llm_errors(self):
+        """Test that rate limits, conflicts, 5xx, dropped connections and empty completions are retried"""
+        for status_code in (408, 409, 429, 500, 503):
+            self.assertTrue(_is_transient_llm_error(groq_error(status_code)), status_code)
+        for status_code in (400, 401, 403, 404, 422):
+            self.assertFalse(_is_transient_llm_error(groq_error(status_code)), status_code)
+        self.assertTrue(_is_transient_llm_error(APIConnectionError(request=httpx.Request('POST', GROQ_URL))))
+        self.assertTrue(_is_transient_llm_error(ValueError("Empty response from LLM")))
+        self.assertFalse(_is_transient_llm_error(KeyError("choices")))
+
+    def test_http_errors(self):
+        """Test that timeouts, 429 and 5xx are retried but other client errors are not"""
+        for status_code in (408, 429, 500, 503):
+            self.assertTrue(_is_transient_http_error(http_error(status_code)), status_code)
+        for status_code in (400, 403, 404):
+            self.assertFalse(_is_transient_http_error(http_error(status_code)), status_code)
+        self.assertTrue(_is_transient_http_error(httpx.ConnectTimeout("timed out")))
+        self.assertFalse(_is_transient_http_error(ValueError("bad JSON")))
+
+class TestRetryDelay(unittest.TestCase):
+    """Test cases for how long a retry waits"""
+
+    def test_honors_retry_after_seconds(self):
+        """Test that a numeric Retry-After is used as is, clamped to [0, MAX_RETRY_AFTER]"""
+        self.assertEqual(_retry_delay(groq_error(429, '2'), 0), 2.0)
+        self.assertEqual(_retry_delay(groq_error(503, '3600'), 0), main.MAX_RETRY_AFTER)
+        self.assertEqual(_retry_delay(groq_error(429, '-5'), 0), 0.0)
+
+    def test_falls_back_to_jittered_backoff(self):
+        """Test that an absent, HTTP-date or garbage Retry-After uses backoff within [d/2, d]"""
+        for retry_after in (None, 'Wed, 21 Oct 2026 07:28:00 GMT', 'soon'):
+            for attempt, delay in ((0, 1), (2, 4), (6, 10)):
+                wait = _retry_delay(groq_error(429, retry_after), attempt)
+                self.assertTrue(delay / 2 <= wait <= delay, (retry_after, attempt, wait))
+        self.assertTrue(0.5 <= _retry_delay(httpx.ConnectTimeout("timed out"), 0) <= 1)
+
+class TestCallGroqLLMRetries(unittest.TestCase):
+    """Test cases for the retry loop in call_groq_llm"""
+
+    def setUp(self):
+        """Stub the Groq client and sleeping, with the response cache off"""
+        self.client = MagicMock()
+        self.sleep = MagicMock()
+        patches = [
+            patch('main.get_groq_client', return_value=self.client),
+            patch('main.time.sleep', self.sleep),
+            patch('main.LLM_CACHE_TTL', 0),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_client_errors_fail_without_retry(self):
+        """Test that 400 and 401 responses raise at once"""
+        for status_code in (400, 401):
+            self.client.chat.completions.create.reset_mock()
+            self.client.chat.completions.create.side_effect = groq_error(status_code)
+
+            with self.assertRaises(APIStatusError):
+                call_groq_llm("prompt")
+            self.assertEqual(self.client.chat.completions.create.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_rate_limit_waits_for_retry_after(self):
+        """Test that 429 and 503 responses are retried after the requested delay"""
+        for status_code in (429, 503):
+            self.sleep.reset_mock()
+            self.client.chat.completions.create.side_effect = [groq_error(status_code, '2'), groq_response("ok")]
+
+            self.assertEqual(call_groq_llm("prompt"), "ok")
+            self.sleep.assert_called_once_with(2.0)
+
+    def test_gives_up_after_retries(self):
+        """Test that the last transient error is raised once every attempt has failed"""
+        self.client.chat.completions.create.side_effect = groq_error(503)
+
+        with self.assertRaises(APIStatusError):
+            call_groq_llm("prompt", retries=3)
+        self.assertEqual(self.client.chat.completions.create.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()